@@ -0,0 +1,165 @@
+import os
+import numpy as np
+from camera_rig import CameraRig
+from utils import extract_camera_parameters_xml, read_camera_parameters, load_camera_params_mat, \
+    read_colmap_model_txt, read_colmap_model_bin, qvec2rotmat, save_camera_parameters_txt
+
+
+# Registered calibration formats, in matching order: name -> (match, loader)
+# match(calib_path) -> bool
+# loader(calib_path, origin_offset, image_size, save_cache) -> CameraRig
+CALIB_FORMATS = {}
+
+
+def register_format(name, match):
+    def decorator(loader):
+        CALIB_FORMATS[name] = (match, loader)
+        return loader
+    return decorator
+
+
+def find_format(calib_path):
+    for name, (match, _) in CALIB_FORMATS.items():
+        if match(calib_path):
+            return name
+    raise ValueError(f'Unknown calibration format: {calib_path}')
+
+
+def load_calibration(calib_path, origin_offset, image_size, save_cache=False):
+    """
+    Loads cameras with the first registered format that matches calib_path.
+
+    Parameters:
+    calib_path (str or list): Calibration file, folder, or list of MVS .txt files.
+    origin_offset (ndarray): Offset subtracted from the world coordinates, (3,).
+    image_size (tuple): Image width and height.
+    save_cache (bool): Let the loader write its converted cameras next to calib_path (Metashape .xml).
+
+    Returns:
+    CameraRig: Loaded cameras.
+    """
+    _, loader = CALIB_FORMATS[find_format(calib_path)]
+    return loader(calib_path, np.asarray(origin_offset, dtype=np.float64), image_size, save_cache)
+
+
+def _extension(calib_path):
+    return calib_path.split('.')[-1].lower() if isinstance(calib_path, str) else None
+
+
+def _colmap_paths(calib_path, ext):
+    # Accepts the model folder or any of its cameras/images files
+    folder = calib_path if os.path.isdir(calib_path) else os.path.dirname(calib_path)
+    return os.path.join(folder, f'cameras.{ext}'), os.path.join(folder, f'images.{ext}')
+
+
+def _is_colmap(calib_path, ext):
+    if not isinstance(calib_path, str):
+        return False
+    if os.path.isdir(calib_path):
+        return all(os.path.exists(p) for p in _colmap_paths(calib_path, ext))
+    return os.path.basename(calib_path) in (f'cameras.{ext}', f'images.{ext}')
+
+
+@register_format('mvs_txt', lambda calib_path: isinstance(calib_path, list))
+def load_mvs_txt(calib_path, origin_offset, image_size, save_cache=False):
+    # MVSNet layout, already in mm and centered, origin_offset is ignored
+    intrinsics = []
+    extrinsics = []
+    labels = []
+    for calib in calib_path:
+        ii, ee = read_camera_parameters(calib)
+        intrinsics.append(ii)
+        extrinsics.append(ee)
+        labels.append(os.path.basename(calib).split('_')[0])    # 00000000_cam.txt -> 00000000
+
+    intrinsics = np.stack(intrinsics)   # (n, 3, 3)
+    extrinsics = np.stack(extrinsics)   # (n, 4, 4)
+    # extrinsics[:, :3, 3] += extrinsics[:,:3,:3].transpose(-2,-1) @ origin_offset   # Transform the center of the object to 0,0,0
+    # extrinsics[:, :3, 3] -= origin_offset   # Transform the center of the object to 0,0,0
+    return CameraRig.from_matrices(intrinsics, extrinsics, labels, dtype=np.float32)
+
+
+@register_format('metashape_xml', lambda calib_path: _extension(calib_path) == 'xml')
+def load_metashape_xml(calib_path, origin_offset, image_size, save_cache=False):
+    camera_params = extract_camera_parameters_xml(calib_path)
+
+    intrinsics = []
+    extrinsics = []
+    labels = []
+    for idx in range(len(camera_params)):
+        tmp_transform = camera_params[idx]['transform_matrix'].astype(np.float32)
+        tmp_intrinsic = np.array(camera_params[idx]['intrinsic_matrix']).astype(np.float32)
+
+        tmp_extrinsic = np.eye(4).astype(np.float32)
+        tmp_extrinsic[:3, :3] = tmp_transform[:3, :3].transpose()
+        tmp_extrinsic[:3, 3] = - tmp_transform[:3, :3].transpose() @ tmp_transform[:3, 3]
+
+        intrinsics.append(tmp_intrinsic)
+        extrinsics.append(tmp_extrinsic)
+        labels.append(camera_params[idx]['label'])
+
+    intrinsics = np.stack(intrinsics)       # (n, 3, 3)
+    intrinsics[:,0,2] += image_size[0]/2    # Transform the image coordinate origin (image coord: center -> top left)
+    intrinsics[:,1,2] += image_size[1]/2    # Transform the image coordinate origin (image coord: center -> top left)
+    # intrinsics[:,0,2] = (intrinsics[:,0,2] - 1024)              # Crop left region
+    # intrinsics[:,1,2] = (intrinsics[:,1,2] - 0)                 # Crop top region
+    # intrinsics[:,:2,:3] = intrinsics[:,:2,:3] * (1920/3072)     # Reflect the resize 3072x3072 -> 1920x1920
+    extrinsics = np.stack(extrinsics)       # (n, 4, 4)
+    extrinsics[:, :3, 3] *= 1000            # m -> mm scale
+    extrinsics[:, :3, 3] += origin_offset @ extrinsics[:,:3,:3].transpose(0,2,1)   # Transform the center of the system to 0,0,0
+
+    rig = CameraRig.from_matrices(intrinsics, extrinsics, labels, dtype=np.float32)
+
+    if save_cache:  # Cache the converted cameras next to the .xml, as .npz and in the MVS .txt layout
+        rig.save_npz(os.path.join(os.path.split(calib_path)[0], 'cameras.npz'))
+        save_cams_path = os.path.join(os.path.split(calib_path)[0], 'cams')
+        os.makedirs(save_cams_path, exist_ok=True)
+        save_camera_parameters_txt(save_cams_path, rig)
+    return rig
+
+
+@register_format('matlab_mat', lambda calib_path: _extension(calib_path) == 'mat')
+def load_matlab_mat(calib_path, origin_offset, image_size, save_cache=False):
+    camera_params = load_camera_params_mat(calib_path)
+    intrinsics = camera_params['K']     # (n, 3, 3)
+    extrinsics = np.tile(np.eye(4), (len(intrinsics), 1, 1))    # (n, 4, 4)
+    labels = [f'{idx:08d}' for idx in range(len(intrinsics))]
+
+    extrinsics[:, :3, :3] = camera_params['R'] @ np.array([[1, 0, 0], [0, -1, 0], [0, 0, -1]])
+    extrinsics[:, :3, 3] = camera_params['T']
+    extrinsics[:, :3, 3] += origin_offset @ extrinsics[:,:3,:3].transpose(0,2,1)   # Transform the center of the system to 0,0,0
+    return CameraRig.from_matrices(intrinsics, extrinsics, labels)
+
+
+@register_format('npz_cache', lambda calib_path: _extension(calib_path) == 'npz')
+def load_npz_cache(calib_path, origin_offset, image_size, save_cache=False):
+    # cameras.npz written by load_metashape_xml, already converted, origin_offset is ignored
+    data = np.load(calib_path)
+    intrinsics = data['intrinsics']
+    extrinsics = data['extrinsics']
+    labels = data['labels'].tolist() if 'labels' in data else [f'{idx:08d}' for idx in range(len(intrinsics))]
+    return CameraRig.from_matrices(intrinsics, extrinsics, labels)
+
+
+def _load_colmap(intrinsics_by_id, images, origin_offset):
+    images = sorted(images, key=lambda image: image[0])     # by image name
+    intrinsics = np.stack([intrinsics_by_id[camera_id] for _, _, _, camera_id in images])
+    extrinsics = np.tile(np.eye(4), (len(images), 1, 1))
+    for idx, (_, qvec, tvec, _) in enumerate(images):
+        extrinsics[idx, :3, :3] = qvec2rotmat(qvec)
+        extrinsics[idx, :3, 3] = tvec
+    extrinsics[:, :3, 3] += origin_offset @ extrinsics[:,:3,:3].transpose(0,2,1)   # Transform the center of the system to 0,0,0
+    labels = [os.path.splitext(os.path.basename(name))[0] for name, _, _, _ in images]
+    return CameraRig.from_matrices(intrinsics, extrinsics, labels)
+
+
+@register_format('colmap_txt', lambda calib_path: _is_colmap(calib_path, 'txt'))
+def load_colmap_txt(calib_path, origin_offset, image_size, save_cache=False):
+    intrinsics_by_id, images = read_colmap_model_txt(*_colmap_paths(calib_path, 'txt'))
+    return _load_colmap(intrinsics_by_id, images, origin_offset)
+
+
+@register_format('colmap_bin', lambda calib_path: _is_colmap(calib_path, 'bin'))
+def load_colmap_bin(calib_path, origin_offset, image_size, save_cache=False):
+    intrinsics_by_id, images = read_colmap_model_bin(*_colmap_paths(calib_path, 'bin'))
+    return _load_colmap(intrinsics_by_id, images, origin_offset)
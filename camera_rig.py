@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class CameraRig:
+    """
+    Struct of arrays for a set of pinhole cameras.
+
+    K (n, 3, 3) intrinsics, R (n, 3, 3) and T (n, 3) world-to-camera extrinsics, labels (n,).
+    Derived quantities are computed on first access and cached. Slicing returns a rig
+    that shares memory with this one (views for int/slice indices).
+    """
+    __slots__ = ('K', 'R', 'T', 'labels', '_centers', '_view_dirs', '_projections', '_world_to_camera')
+
+    def __init__(self, K, R, T, labels=None, dtype=np.float64):
+        self.K = np.ascontiguousarray(K, dtype=dtype)
+        self.R = np.ascontiguousarray(R, dtype=dtype)
+        self.T = np.ascontiguousarray(T, dtype=dtype)
+        if labels is None:
+            labels = [f'{idx:08d}' for idx in range(len(self.K))]
+        self.labels = np.asarray(labels, dtype=str)
+        self._centers = None
+        self._view_dirs = None
+        self._projections = None
+        self._world_to_camera = None
+
+    @classmethod
+    def from_matrices(cls, intrinsics, extrinsics, labels=None, dtype=np.float64):
+        """Builds a rig from (n, 3, 3) intrinsics and (n, 4, 4) or (n, 3, 4) extrinsics."""
+        return cls(intrinsics[:, :3, :3], extrinsics[:, :3, :3], extrinsics[:, :3, 3], labels, dtype)
+
+    def __len__(self):
+        return len(self.K)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            idx = slice(idx, idx + 1 if idx != -1 else None)
+        rig = CameraRig.__new__(CameraRig)
+        rig.K = self.K[idx]
+        rig.R = self.R[idx]
+        rig.T = self.T[idx]
+        rig.labels = self.labels[idx]
+        for name in ('_centers', '_view_dirs', '_projections', '_world_to_camera'):
+            cached = getattr(self, name)
+            setattr(rig, name, cached[idx] if cached is not None else None)
+        return rig
+
+    @property
+    def dtype(self):
+        return self.K.dtype
+
+    @property
+    def centers(self):
+        """Camera centers in world coordinates, (n, 3)."""
+        if self._centers is None:
+            self._centers = -np.einsum('ni,nij->nj', self.T, self.R)
+        return self._centers
+
+    @property
+    def view_dirs(self):
+        """Viewing directions (camera z axis) in world coordinates, (n, 3)."""
+        if self._view_dirs is None:
+            self._view_dirs = np.ascontiguousarray(self.R[:, 2, :])
+        return self._view_dirs
+
+    @property
+    def world_to_camera(self):
+        """World-to-camera extrinsic matrices, (n, 4, 4)."""
+        if self._world_to_camera is None:
+            E = np.zeros((len(self), 4, 4), dtype=self.dtype)
+            E[:, :3, :3] = self.R
+            E[:, :3, 3] = self.T
+            E[:, 3, 3] = 1
+            self._world_to_camera = E
+        return self._world_to_camera
+
+    @property
+    def projections(self):
+        """Projection matrices K [R | T], (n, 3, 4)."""
+        if self._projections is None:
+            self._projections = self.K @ self.world_to_camera[:, :3, :]
+        return self._projections
+
+    def save_npz(self, path):
+        # Same keys as the cameras.npz cache written from Metashape .xml
+        np.savez(path, intrinsics=self.K, extrinsics=self.world_to_camera, labels=self.labels)
@@ -3,16 +3,17 @@ import sys
 import numpy as np
 
 from glob import glob
-from PyQt5 import QtWidgets, QtCore
+from PyQt5 import QtWidgets, QtCore, QtGui
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 
 from renderer import CameraPlotter
 from recon_camera import CameraReconstructor
+from calib_formats import load_calibration
 
 
 
 class Visualizer(QtWidgets.QWidget):
-    def __init__(self, image_size, calib_path, mesh_path=None, parent=None):
+    def __init__(self, image_size, calib_path, mesh_path=None, compare_calib_paths=None, pc_path=None, voxel_size=None, fly_through=False, image_dir=None, parent=None):
         super().__init__(parent)
         self.timer = QtCore.QTimer()
         self.timer.setInterval(33)
@@ -22,6 +23,12 @@ class Visualizer(QtWidgets.QWidget):
         self.init_ui()
 
         self.load_data(calib_path, mesh_path, image_size)
+        if compare_calib_paths is not None:
+            self.load_comparison(compare_calib_paths, image_size)
+        if pc_path is not None:
+            self.load_point_cloud(pc_path, voxel_size)
+        if fly_through:
+            self.load_fly_through(image_size, image_dir)
     
     def init_ui(self):
         renderer_before = QVTKRenderWindowInteractor(self)
@@ -29,8 +36,18 @@ class Visualizer(QtWidgets.QWidget):
         self.plotter_before.show()
 
         
+        # Fly-through: view through each camera, scrubbed with the slider
+        self.frame_view = QtWidgets.QLabel(self)
+        self.frame_view.setAlignment(QtCore.Qt.AlignCenter)
+        self.frame_view.hide()
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.slider.valueChanged.connect(self.show_camera_frame)
+        self.slider.hide()
+
         layout = QtWidgets.QGridLayout()
         layout.addWidget(renderer_before,  0, 0, 1, 1)
+        layout.addWidget(self.frame_view,  0, 1, 1, 1)
+        layout.addWidget(self.slider,      1, 0, 1, 2)
         self.setLayout(layout)
     
     def load_data(self, calib_path, mesh_path, image_size):
@@ -39,17 +56,83 @@ class Visualizer(QtWidgets.QWidget):
             self.plotter_before.add_mesh()
         else:
             origin_offset = np.array([0.0, 0.0, 0.0]) 
+        self.origin_offset = origin_offset
+        self.mesh_scale = self.plotter_before.mesh_scale(calib_path)
 
         self.reconstructor = CameraReconstructor(calib_path, origin_offset, image_size)
         camera_params = self.reconstructor.camera_params
         self.plotter_before.load_cameras(camera_params)
         self.plotter_before.add_cameras()
 
+    def load_fly_through(self, image_size, image_dir=None, alpha=0.5, prerender=True):
+        # image_dir: captured images named by camera label (images/00000000.jpg), blended with the rendered view
+        labels = self.reconstructor.camera_params.labels
+        self.image_size = image_size
+        self.image_paths = None if image_dir is None else [os.path.join(image_dir, f'{label}.jpg') for label in labels]
+        self.alpha = alpha
+        self.seq_len = len(labels)
+
+        self.slider.setRange(0, self.seq_len - 1)
+        self.slider.show()
+        self.frame_view.show()
+        # Space: play / pause stepping through the cameras. A window shortcut, since key presses
+        # go to the focused VTK widget and never reach this widget's keyPressEvent
+        self.play_shortcut = QtWidgets.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Space), self)
+        self.play_shortcut.setContext(QtCore.Qt.WindowShortcut)
+        self.play_shortcut.activated.connect(self.toggle_play)
+        # Render once the window is shown and laid out, the frames depend on the render window size
+        QtCore.QTimer.singleShot(0, self.prerender_camera_frames if prerender else self.show_current_frame)
+
+    def prerender_camera_frames(self):
+        num_frames = min(self.seq_len, self.plotter_before.frame_cache.max_frames)
+        self.plotter_before.prerender_camera_frames(range(num_frames), self.image_size, self.image_paths, self.alpha)
+        self.show_current_frame()
+
+    def show_current_frame(self):
+        self.show_camera_frame(self.slider.value())
+
+    def show_camera_frame(self, idx):
+        image_path = self.image_paths[idx] if self.image_paths is not None else None
+        frame = np.ascontiguousarray(self.plotter_before.get_camera_frame(idx, self.image_size, image_path, self.alpha))
+        h, w = frame.shape[:2]
+        qimage = QtGui.QImage(frame.data, w, h, 3 * w, QtGui.QImage.Format_RGB888)
+        pixmap = QtGui.QPixmap.fromImage(qimage).scaled(self.frame_view.size(), QtCore.Qt.KeepAspectRatio)
+        self.frame_view.setPixmap(pixmap)
+
+    def resizeEvent(self, event):
+        # The frame cache is cleared on a new render window size, re-render the current frame
+        super().resizeEvent(event)
+        if self.slider.isVisible():
+            QtCore.QTimer.singleShot(0, self.show_current_frame)
+
+    def toggle_play(self):
+        self.play = not self.play
+        if self.play:
+            self.counter = self.slider.value()     # continue from the current camera
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def load_point_cloud(self, pc_path, voxel_size=None):
+        # Vertex-only .obj (hair strands, dense MVS points) in the frame of the mesh file,
+        # scaled and centered like the mesh so it lines up with the cameras
+        self.plotter_before.init_point_cloud(pc_path, self.mesh_scale, self.origin_offset, voxel_size)
+        self.plotter_before.add_point_cloud()
+
+    def load_comparison(self, compare_calib_paths, image_size):
+        # Overlay other calibrations of the same rig, aligned to the loaded one (viewer only, no cache files written)
+        camera_params_list = [self.reconstructor.camera_params]
+        for compare_calib_path in compare_calib_paths:
+            camera_params_list.append(load_calibration(compare_calib_path, np.array([0.0, 0.0, 0.0]), image_size, save_cache=False))
+        self.plotter_before.load_comparison(camera_params_list)
+        self.plotter_before.add_comparison()
+
 
     def render(self):
         if self.counter > self.seq_len - 1:
             self.counter = 0
 
+        self.slider.setValue(self.counter)
         self.counter += 1
 
 
@@ -69,7 +152,19 @@ if __name__ == '__main__':
     # mesh_path = os.path.abspath('./data/example_metashape/mesh3D.obj')
     # mesh_path = os.path.abspath('./data/test/mesh3D.obj')
 
-    window = Visualizer(image_size, calib_path, mesh_path)
+    compare_calib_paths = None
+    # compare_calib_paths = [os.path.abspath('./data/test/cameras.xml')]   # Rigs to compare against calib_path, matched by camera label
+
+    pc_path = None
+    # pc_path = os.path.abspath('./data/example_mvs_txt/dense_points.obj')     # Vertex-only point cloud
+    voxel_size = None
+    # voxel_size = 1.0     # Voxel-downsample the point cloud while loading (mm)
+
+    fly_through = False     # View through each camera, slider to scrub, space to play
+    image_dir = None
+    # image_dir = os.path.abspath('./data/example_mvs_txt/images')     # Blend the captured images into the fly-through
+
+    window = Visualizer(image_size, calib_path, mesh_path, compare_calib_paths, pc_path, voxel_size, fly_through, image_dir)
 
     window.setWindowTitle('Visualizer')
     window.setGeometry(100, 200, 600, 800)
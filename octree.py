@@ -0,0 +1,96 @@
+import numpy as np
+
+
+def _part1by2(x):
+    """Spreads the lower 21 bits of x so that there are two zero bits between each bit."""
+    x = x & np.uint64(0x1fffff)
+    x = (x | x << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    x = (x | x << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    x = (x | x << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    x = (x | x << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    x = (x | x << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return x
+
+
+def morton_codes(cells):
+    """
+    Interleaves integer cell coordinates into Morton (z-order) codes.
+
+    Parameters:
+    cells (ndarray): Integer cell coordinates, (n, 3), each below 2**21.
+
+    Returns:
+    ndarray: Morton codes, (n,) uint64.
+    """
+    cells = cells.astype(np.uint64)
+    return _part1by2(cells[:, 0]) | (_part1by2(cells[:, 1]) << np.uint64(1)) | (_part1by2(cells[:, 2]) << np.uint64(2))
+
+
+class PointOctree:
+    def __init__(self, vertices, colors=None, max_depth=12):
+        """
+        Linear octree over a point cloud for level-of-detail display.
+        Points are sorted by Morton code, so every octree node is a contiguous range
+        and one representative point per node gives the points of a level.
+        """
+        self.max_depth = int(min(max_depth, 21))
+        self.bounds_min = vertices.min(axis=0)
+        self.extent = max(float((vertices.max(axis=0) - self.bounds_min).max()), 1e-9)
+
+        n_cells = 1 << self.max_depth
+        cells = ((vertices - self.bounds_min) / self.extent * n_cells).astype(np.int64)
+        cells = np.clip(cells, 0, n_cells - 1)
+        codes = morton_codes(cells)
+
+        order = np.argsort(codes, kind='stable')
+        self.codes = codes[order]
+        self.vertices = vertices[order]
+        self.colors = colors[order] if colors is not None else None
+        self._levels = {}   # level -> indices of the representative points
+
+    def level_indices(self, level):
+        level = int(np.clip(level, 0, self.max_depth))
+        if level not in self._levels:
+            keys = self.codes >> np.uint64(3 * (self.max_depth - level))
+            first = np.ones(len(keys), dtype=bool)
+            first[1:] = keys[1:] != keys[:-1]
+            self._levels[level] = np.flatnonzero(first)
+        return self._levels[level]
+
+    def level_for_budget(self, budget):
+        """Deepest level whose representative points fit in the budget."""
+        level = 0
+        for depth in range(1, self.max_depth + 1):
+            if len(self.level_indices(depth)) > budget:
+                break
+            level = depth
+        return level
+
+    def level_for_spacing(self, spacing):
+        """Shallowest level whose cell size is below the given point spacing."""
+        if spacing <= 0:
+            return self.max_depth
+        return int(np.clip(np.ceil(np.log2(self.extent / spacing)), 0, self.max_depth))
+
+    def query(self, level, center=None, radius=None):
+        """
+        Indices of the representative points of a level, optionally restricted to
+        the axis-aligned box of half size radius around center.
+        """
+        idx = self.level_indices(level)
+        if center is not None and radius is not None:
+            inside = np.all(np.abs(self.vertices[idx] - center) <= radius, axis=1)
+            idx = idx[inside]
+        return idx
+
+    def refine(self, coarse_level, fine_level, center, radius, budget=None):
+        """
+        Progressive refinement: coarse points everywhere, fine points around center.
+        The fine level is lowered until the result fits in the budget.
+        """
+        coarse = self.level_indices(coarse_level)
+        for level in range(max(fine_level, coarse_level), coarse_level, -1):
+            fine = self.query(level, center, radius)
+            if budget is None or len(coarse) + len(fine) <= budget:
+                return np.union1d(coarse, fine)
+        return coarse
@@ -2,7 +2,10 @@ import os
 import json
 import numpy as np
 import vedo
-from utils import load_obj, save_obj
+from collections import OrderedDict
+from vtkmodules.vtkRenderingCore import vtkCamera
+from octree import PointOctree
+from utils import normalize_obj, save_obj_chunked, compare_camera_params, load_point_cloud, blend_image
 
 
 def load_config(config_path):
@@ -30,7 +33,45 @@ class Mesh:
     def update(self, vertices):
         self.mesh.points(vertices)
 
-    
+
+class PointCloud:
+    def __init__(self, vertices, colors=None, budget=2000000, max_depth=12, r=2):
+        self.pc = None
+        self.budget = budget
+        self.r = r
+        self.octree = PointOctree(vertices, colors, max_depth)
+        self.coarse_level = self.octree.level_for_budget(budget // 4)
+        self.initialize(self.octree.level_indices(self.octree.level_for_budget(budget)))
+
+    def initialize(self, indices):
+        vertices = self.octree.vertices[indices]
+        if self.octree.colors is not None:
+            self.pc = vedo.Points(vertices, r=self.r, c=self.octree.colors[indices])
+        else:
+            self.pc = vedo.Points(vertices, r=self.r, c=[225, 225, 225])
+
+    def add(self, vp):
+        vp.add(self.pc)
+
+    def remove(self, vp):
+        vp.remove(self.pc)
+
+    def update(self, vp):
+        # Refine around the focal point down to about one point per pixel, within the budget
+        camera = vp.camera
+        distance = camera.GetDistance()
+        visible_height = 2.0 * distance * np.tan(np.radians(camera.GetViewAngle()) / 2.0)
+        pixel_spacing = visible_height / max(vp.window.GetSize()[1], 1)
+
+        fine_level = self.octree.level_for_spacing(pixel_spacing)
+        center = np.array(camera.GetFocalPoint())
+        indices = self.octree.refine(self.coarse_level, fine_level, center, visible_height / 2.0, self.budget)
+
+        self.remove(vp)
+        self.initialize(indices)
+        self.add(vp)
+
+
 class Cameras:
     def __init__(self, camera_params):
         self.camera_params = camera_params
@@ -38,13 +79,13 @@ class Cameras:
         self.initialize()
     
     def initialize(self):
-        rotmats = self.camera_params['R']
-        transls = self.camera_params['T']
-        for idx, (rotmat, transl) in enumerate(zip(rotmats, transls)):
+        rotmats = self.camera_params.R
+        centers = self.camera_params.centers        # cached on the rig, computed once for all cameras
+        for idx, (rotmat, center) in enumerate(zip(rotmats, centers)):
             nametxt = 'CAM{:02d}'.format(idx + 1)
             
             camera_rotmat = rotmat                  # extrinisic contains translation
-            camera_transl = - transl @ rotmat       # extrinisic contains translation
+            camera_transl = center                  # extrinisic contains translation
 
             self.cameras['names'].append(self.get_name(nametxt, camera_transl))
             self.cameras['pyramids'].append(self.get_pyramid(camera_rotmat.T, camera_transl))
@@ -83,6 +124,122 @@ class Cameras:
         return [x_axis, y_axis, z_axis]
 
 
+class CameraComparison:
+    rig_colors = ['y', 'c', 'm', 'o', 'p']
+
+    def __init__(self, camera_params_list, with_scale=True):
+        self.camera_params_list = camera_params_list
+        self.with_scale = with_scale
+        self.results = []
+        self.actors = []
+        self.initialize()
+
+    def initialize(self):
+        # Every rig is aligned to the first one, cameras are matched by label
+        params_ref = self.camera_params_list[0]
+        for params_cmp in self.camera_params_list[1:]:
+            self.results.append(compare_camera_params(params_ref, params_cmp, self.with_scale))
+
+        # One batched actor per quantity, so thousands of cameras stay interactive
+        if not self.results:
+            return
+        self.actors.append(vedo.Points(self.results[0]['centers_ref'], r=8, c='w'))
+        self.actors.append(vedo.Text2D('ref', pos=(0.02, 0.95), s=0.8, c='w'))
+
+        # Shared color ranges, so one scalar bar per quantity holds for every rig (non-empty for identical rigs)
+        rot_range = (0.0, max(float(result['rot_delta'].max(initial=1e-6)) for result in self.results))
+        transl_range = (0.0, max(float(result['transl_delta'].max(initial=1e-6)) for result in self.results))
+        for idx, result in enumerate(self.results):
+            c = self.rig_colors[idx % len(self.rig_colors)]
+            self.actors += self.get_glyphs(result, c, rot_range, transl_range, scalarbars=(idx == 0))
+            self.actors.append(vedo.Text2D(f'rig {idx + 1}', pos=(0.02, 0.95 - 0.04 * (idx + 1)), s=0.8, c=c))  # rig color = direction lines
+            print(f"rig {idx + 1}: {len(result['labels'])} matched cameras, scale {result['scale']:.4f}, "
+                  f"transl delta mean {result['transl_delta'].mean():.3f} max {result['transl_delta'].max():.3f}, "
+                  f"rot delta mean {result['rot_delta'].mean():.3f} max {result['rot_delta'].max():.3f} deg")
+
+    def add(self, vp):
+        vp.add(self.actors)
+
+    def remove(self, vp):
+        vp.remove(self.actors)
+
+    @staticmethod
+    def get_glyphs(result, c, rot_range, transl_range, scalarbars=True, scale=200):     # control scale heuristically, 400(mm scale)
+        centers_ref = result['centers_ref']
+        centers_aligned = result['centers_aligned']
+
+        # Aligned camera centers, colored by rotation delta
+        points = vedo.Points(centers_aligned, r=8)
+        points.cmap('viridis', result['rot_delta'], on='points', name='rot_delta', vmin=rot_range[0], vmax=rot_range[1])
+
+        # Translation delta, one line cell per camera
+        deltas = vedo.Lines(centers_ref, centers_aligned, lw=3)
+        deltas.cmap('jet', result['transl_delta'], on='cells', name='transl_delta', vmin=transl_range[0], vmax=transl_range[1])
+
+        if scalarbars:  # once for all rigs, the color ranges are shared
+            points.add_scalarbar(title='rot delta (deg)', pos=(0.85, 0.55))
+            deltas.add_scalarbar(title='transl delta', pos=(0.85, 0.05))
+
+        # Viewing direction (camera z axis) of the aligned rig, in the rig color
+        view_dirs = result['R_aligned'][:, 2, :]
+        directions = vedo.Lines(centers_aligned, centers_aligned + view_dirs * scale, c=c, alpha=0.5)
+        return [points, deltas, directions]
+
+
+class FrameCache:
+    def __init__(self, max_frames=64):
+        # LRU cache of rendered camera views, keyed by camera index, valid for one window size
+        self.max_frames = max_frames
+        self.frames = OrderedDict()
+        self.window_size = None
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def get(self, key):
+        if key not in self.frames:
+            return None
+        self.frames.move_to_end(key)
+        return self.frames[key]
+
+    def put(self, key, frame):
+        self.frames[key] = frame
+        self.frames.move_to_end(key)
+        while len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+
+    def clear(self):
+        self.frames.clear()
+
+
+def set_vtk_camera(camera, K, R, T, image_size, window_size):
+    """
+    Sets a vtkCamera to look through a calibrated camera.
+    The image is fitted inside the window, the principal point is mapped with the window center.
+
+    Returns:
+    tuple: Pixel region (x0, y0, width, height) of the window covered by the image.
+    """
+    w, h = image_size
+    W, H = window_size
+    center = - T @ R
+    camera.SetPosition(*center)
+    camera.SetFocalPoint(*(center + R[2]))    # camera z axis in world
+    camera.SetViewUp(*(-R[1]))                 # image y axis points down
+
+    scale = min(W / w, H / h)   # window pixels per image pixel
+    if W / w < H / h:           # window narrower than the image, fit the width
+        camera.SetUseHorizontalViewAngle(True)
+        camera.SetViewAngle(np.degrees(2.0 * np.arctan(w / (2.0 * K[0, 0]))))
+    else:
+        camera.SetUseHorizontalViewAngle(False)
+        camera.SetViewAngle(np.degrees(2.0 * np.arctan(h / (2.0 * K[1, 1]))))
+    camera.SetWindowCenter(-2.0 * (K[0, 2] - w / 2.0) * scale / W, 2.0 * (K[1, 2] - h / 2.0) * scale / H)
+
+    width, height = int(round(w * scale)), int(round(h * scale))
+    return (W - width) // 2, (H - height) // 2, width, height
+
+
 class CameraPlotter:
     def __init__(self, qt_widget=None):
         self.vp = vedo.Plotter(
@@ -96,30 +253,44 @@ class CameraPlotter:
         self.vp.add(vedo.Point([0.0, 0.0, 0.0], c='r'))
 
         self.cameras = None
+        self.comparison = None
         self.origin = None
         self.mesh = None
+        self.point_cloud = None
+        self.frame_cache = FrameCache()
     
     def load_cameras(self, camera_params):
         if self.cameras is not None:
             self.remove_cameras()
         self.cameras = Cameras(camera_params)
+        self.frame_cache.clear()
+
+    def load_comparison(self, camera_params_list, with_scale=True):
+        if self.comparison is not None:
+            self.remove_comparison()
+        self.comparison = CameraComparison(camera_params_list, with_scale)
     
+    @staticmethod
+    def mesh_scale(calib_path):
+        # .txt cameras are in mm like their mesh, Metashape .xml meshes are in m
+        return 1.0 if isinstance(calib_path, list) else 1000.0
+
     def init_mesh(self, mesh_path, calib_path):
+        # Streaming pass, vertices/faces are memory-mapped binaries next to the mesh
         if isinstance(calib_path, list):
-            obj_dict = load_obj(mesh_path)              # when .txt format, mm scale
+            obj_dict = normalize_obj(mesh_path, os.path.splitext(mesh_path)[0], scale=1.0, center=False)   # when .txt format, mm scale, ignore origin_offset
             v = obj_dict['vertices']
             f = obj_dict['faces']
-            origin_offset = v.mean(axis=0)*0.0      # when .txt format, ignore origin_offset
+            origin_offset = obj_dict['origin_offset']
         else:
-            obj_dict = load_obj(mesh_path)
+            origin_prefix = os.path.splitext(mesh_path)[0] + '_1000_origin'
+            origin_mesh_path = origin_prefix + '.obj'
+            obj_dict = normalize_obj(mesh_path, origin_prefix, scale=1000.0, center=True)    # when .xml format, m -> mm, get origin_offset, transform system to origin
             v = obj_dict['vertices']
             f = obj_dict['faces']
-            c = obj_dict['colors']            
-            v *= 1000.0             # when .xml format, m -> mm
-            origin_offset = v.mean(axis=0)
-            v = v - origin_offset   # when .xml format, get origin_offset, transform system to origin
-            origin_mesh_path = mesh_path.split('.')[0] + '_1000_origin.obj'
-            save_obj(origin_mesh_path, v, f, c)
+            c = obj_dict['colors']
+            origin_offset = obj_dict['origin_offset']
+            save_obj_chunked(origin_mesh_path, v, f, c)
 
         self.mesh = Mesh(v, f)
         
@@ -127,10 +298,70 @@ class CameraPlotter:
         print(f"origin_offset: {origin_offset}")
         return origin_offset
     
+    def init_point_cloud(self, pc_path, scale=1.0, origin_offset=None, voxel_size=None, budget=2000000):
+        # Vertex-only .obj, e.g. from save_hair2pc, in the units and frame of the mesh file:
+        # scale and origin_offset are the ones init_mesh applied to the mesh
+        v, c = load_point_cloud(pc_path, voxel_size=voxel_size, scale=scale, origin_offset=origin_offset)
+        if len(v) == 0:
+            raise ValueError(f'No vertices in point cloud: {pc_path}')
+        self.point_cloud = PointCloud(v, c, budget=budget)
+
+        print(f"pc_path: {pc_path}")
+        print(f"num_points: {len(v)}")
+
+    def snap_to_camera(self, idx, image_size):
+        camera_params = self.cameras.camera_params
+        region = set_vtk_camera(self.vp.camera, camera_params.K[idx], camera_params.R[idx],
+                                camera_params.T[idx], image_size, self.vp.window.GetSize())
+        self.vp.renderer.ResetCameraClippingRange()
+        self.vp.render()
+        return region
+
+    def get_camera_frame(self, idx, image_size, image_path=None, alpha=0.5):
+        # View through camera idx, rendered views are cached so scrubbing does not re-render
+        frame = self.frame_cache.get(idx)
+        if frame is None:
+            self.prerender_camera_frames([idx], image_size, {idx: image_path}, alpha)
+            frame = self.frame_cache.get(idx)
+        return frame
+
+    def prerender_camera_frames(self, indices, image_size, image_paths=None, alpha=0.5):
+        # Fill the frame cache, then restore the interactive view
+        window_size = tuple(self.vp.window.GetSize())
+        if window_size != self.frame_cache.window_size:    # frames and crop regions depend on the window size
+            self.frame_cache.clear()
+            self.frame_cache.window_size = window_size
+        view = vtkCamera()
+        view.DeepCopy(self.vp.camera)
+        for idx in indices:
+            if idx in self.frame_cache:
+                continue
+            x0, y0, width, height = self.snap_to_camera(idx, image_size)
+            frame = self.vp.screenshot(asarray=True)[y0:y0 + height, x0:x0 + width]
+            image_path = image_paths[idx] if image_paths is not None else None
+            if image_path is not None:
+                frame = blend_image(frame, image_path, alpha)
+            self.frame_cache.put(idx, frame)
+        self.vp.camera.DeepCopy(view)
+        self.vp.render()
+
     def add_cameras(self):
         self.cameras.add(self.vp)
         self.vp.render()
 
+    def add_point_cloud(self):
+        self.point_cloud.add(self.vp)
+        self.vp.add_callback('EndInteraction', self.update_point_cloud)
+        self.vp.render()
+
+    def update_point_cloud(self, event=None):
+        self.point_cloud.update(self.vp)
+        self.vp.render()
+
+    def add_comparison(self):
+        self.comparison.add(self.vp)
+        self.vp.render()
+
     def add_origin(self):
         self.vp.add(self.origin)
         self.vp.render()
@@ -142,6 +373,10 @@ class CameraPlotter:
     def remove_cameras(self):
         self.cameras.remove(self.vp)
         self.vp.render()
+
+    def remove_comparison(self):
+        self.comparison.remove(self.vp)
+        self.vp.render()
     
     def show(self):
         self.vp.show()
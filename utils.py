@@ -1,7 +1,8 @@
-import cv2 as cv
+import os
 import numpy as np
-import scipy.io as spio
-import xml.etree.ElementTree as ET
+
+# cv2, scipy.io and ElementTree are imported where they are used,
+# so that importing utils does not pay for loaders that are not needed.
 
 
 def extract_camera_parameters_xml(xml_file_path):
@@ -14,6 +15,8 @@ def extract_camera_parameters_xml(xml_file_path):
     Returns:
     list: A list of dictionaries containing camera parameters and calibration data.
     """
+    import xml.etree.ElementTree as ET
+
     # Parse the XML file
     tree = ET.parse(xml_file_path)
     root = tree.getroot()
@@ -143,6 +146,8 @@ def load_K_Rt_from_P(filename, P=None):
     Returns:
     tuple: Intrinsics and pose matrices.
     """
+    import cv2 as cv
+
     out = cv.decomposeProjectionMatrix(P)
     K = out[0]
     R = out[1]
@@ -166,6 +171,8 @@ def loadmat(filename):
     from mat files. It calls the function check keys to cure all entries
     which are still mat-objects
     '''
+    import scipy.io as spio
+
     data = spio.loadmat(filename, struct_as_record=False, squeeze_me=True)
     return _check_keys(data)
 
@@ -175,6 +182,8 @@ def _check_keys(d):
     checks if entries in dictionary are mat-objects. If yes
     todict is called to change them to nested dictionaries
     '''
+    import scipy.io as spio
+
     for key in d:
         if isinstance(d[key], spio.matlab.mio5_params.mat_struct):
             d[key] = _todict(d[key])
@@ -185,6 +194,8 @@ def _todict(matobj):
     '''
     A recursive function which constructs from matobjects nested dictionaries
     '''
+    import scipy.io as spio
+
     d = {}
     for strg in matobj._fieldnames:
         elem = matobj.__dict__[strg]
@@ -205,6 +216,8 @@ def _tolist(ndarray):
     (which are loaded as numpy ndarrays), recursing into the elements
     if they contain matobjects.
     '''
+    import scipy.io as spio
+
     elem_list = []
     for sub_elem in ndarray:
         if isinstance(sub_elem, spio.matlab.mio5_params.mat_struct):
@@ -215,19 +228,112 @@ def _tolist(ndarray):
             elem_list.append(sub_elem)
     return elem_list
 
-def construct_cam_matrices(camera_params):
-    K = camera_params['K']
-    R, t = camera_params['R'], camera_params['T']
-    num_cams = K.shape[0]
-    cam_matrices = np.zeros((num_cams, 4, 3))
-    for cidx in range(num_cams):
-        extrinsic = np.vstack([R[cidx].T, -t[cidx]])
-        cam_matrices[cidx] = extrinsic @ K[cidx].T
-    return cam_matrices
+def construct_cam_matrices(rig):
+    # (n, 4, 3) row-vector camera matrices [R^T; -t] @ K^T
+    extrinsic = np.concatenate([rig.R.transpose(0, 2, 1), -rig.T[:, None, :]], axis=1)
+    return extrinsic @ rig.K.transpose(0, 2, 1)
+
+
+def match_camera_labels(labels_a, labels_b):
+    """
+    Matches two rigs by camera label.
+
+    Parameters:
+    labels_a (list): Camera labels of the reference rig.
+    labels_b (list): Camera labels of the other rig.
+
+    Returns:
+    tuple: Index arrays (idx_a, idx_b) of the cameras present in both rigs, in reference order.
+    """
+    lookup_b = {label: idx for idx, label in enumerate(labels_b)}
+    idx_a = [idx for idx, label in enumerate(labels_a) if label in lookup_b]
+    idx_b = [lookup_b[labels_a[idx]] for idx in idx_a]
+    return np.array(idx_a, dtype=np.int64), np.array(idx_b, dtype=np.int64)
+
+
+def umeyama(src, dst, with_scale=True):
+    """
+    Estimates the similarity transform dst ~ s * R @ src + t (Umeyama, 1991).
+
+    Parameters:
+    src (ndarray): Source points, (n, 3).
+    dst (ndarray): Destination points, (n, 3).
+    with_scale (bool): Estimate the scale, otherwise a rigid transform (s = 1).
+
+    Returns:
+    tuple: Scale, rotation (3, 3) and translation (3,).
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    mu_src = src.mean(axis=0)
+    mu_dst = dst.mean(axis=0)
+    src_c = src - mu_src
+    dst_c = dst - mu_dst
+
+    cov = dst_c.T @ src_c / len(src)
+    U, D, Vt = np.linalg.svd(cov)
+    S = np.eye(3)
+    if np.linalg.det(U) * np.linalg.det(Vt) < 0:     # Avoid reflection
+        S[2, 2] = -1
+
+    R = U @ S @ Vt
+    var_src = (src_c ** 2).sum() / len(src)
+    scale = np.trace(np.diag(D) @ S) / var_src if with_scale and var_src > 0 else 1.0
+    t = mu_dst - scale * R @ mu_src
+    return scale, R, t
+
+
+def compare_camera_params(rig_ref, rig_cmp, with_scale=True):
+    """
+    Aligns a rig to a reference rig and computes per-camera pose deltas in one batched pass.
+    Cameras are matched by label, the alignment is estimated from the matched camera centers.
+
+    Parameters:
+    rig_ref (CameraRig): Reference cameras.
+    rig_cmp (CameraRig): Compared cameras.
+    with_scale (bool): Similarity alignment if True, rigid alignment otherwise.
+
+    Returns:
+    dict: Matched indices, alignment, aligned centers/rotations and translation/rotation deltas.
+    """
+    idx_ref, idx_cmp = match_camera_labels(rig_ref.labels, rig_cmp.labels)
+    if len(idx_ref) < 3:
+        raise ValueError(f'At least 3 cameras must share labels to align rigs, got {len(idx_ref)}')
+
+    rig_ref, rig_cmp = rig_ref[idx_ref], rig_cmp[idx_cmp]
+    R_ref = rig_ref.R.astype(np.float64)
+    R_cmp = rig_cmp.R.astype(np.float64)
+    centers_ref = rig_ref.centers.astype(np.float64)
+    centers_cmp = rig_cmp.centers.astype(np.float64)
+
+    scale, R_align, t_align = umeyama(centers_cmp, centers_ref, with_scale)
+    centers_aligned = scale * centers_cmp @ R_align.T + t_align
+    R_aligned = R_cmp @ R_align.T         # world-to-camera rotation in the reference frame
+
+    # Relative rotation angle, trace(R_ref @ R_aligned^T) without forming the products
+    trace = np.einsum('nij,nij->n', R_ref, R_aligned)
+    rot_delta = np.degrees(np.arccos(np.clip((trace - 1.0) / 2.0, -1.0, 1.0)))
+    transl_delta = np.linalg.norm(centers_aligned - centers_ref, axis=1)
+
+    return {
+        'labels': rig_ref.labels,
+        'idx_ref': idx_ref,
+        'idx_cmp': idx_cmp,
+        'scale': scale,
+        'R_align': R_align,
+        't_align': t_align,
+        'centers_ref': centers_ref,
+        'centers_aligned': centers_aligned,
+        'R_aligned': R_aligned,
+        'transl_delta': transl_delta,       # same unit as the reference rig
+        'rot_delta': rot_delta              # degrees
+    }
 
 
 def load_camera_params_mat(calibpath, is_meters=False):
     # .mat
+    import cv2 as cv
+
     calibname = calibpath.split('/')[-1]
     root_key = 'calibrationOptimized' if calibname.startswith('optimized') \
         else 'calibration'
@@ -250,6 +356,145 @@ def load_camera_params_mat(calibpath, is_meters=False):
     return params_dict
 
 
+# COLMAP camera models: model_id -> (name, number of params)
+COLMAP_CAMERA_MODELS = {
+    0: ('SIMPLE_PINHOLE', 3),
+    1: ('PINHOLE', 4),
+    2: ('SIMPLE_RADIAL', 4),
+    3: ('RADIAL', 5),
+    4: ('OPENCV', 8),
+    5: ('OPENCV_FISHEYE', 8),
+    6: ('FULL_OPENCV', 12),
+    7: ('FOV', 5),
+    8: ('SIMPLE_RADIAL_FISHEYE', 4),
+    9: ('RADIAL_FISHEYE', 5),
+    10: ('THIN_PRISM_FISHEYE', 12)
+}
+
+
+def colmap_intrinsic_matrix(model, params):
+    """
+    Builds the 3x3 intrinsic matrix of a COLMAP camera, distortion parameters are ignored.
+
+    Parameters:
+    model (str): COLMAP camera model name.
+    params (list): Camera parameters in COLMAP order.
+
+    Returns:
+    ndarray: Intrinsic matrix.
+    """
+    if model.startswith('SIMPLE') or model in ('RADIAL', 'RADIAL_FISHEYE'):
+        fx = fy = params[0]
+        cx, cy = params[1], params[2]
+    else:
+        fx, fy, cx, cy = params[:4]
+    return np.array([
+        [fx, 0, cx],
+        [0, fy, cy],
+        [0, 0, 1]
+    ])
+
+
+def qvec2rotmat(qvec):
+    """ Converts a COLMAP quaternion (w, x, y, z) to a rotation matrix. """
+    w, x, y, z = qvec
+    return np.array([
+        [1 - 2 * y * y - 2 * z * z, 2 * x * y - 2 * w * z, 2 * x * z + 2 * w * y],
+        [2 * x * y + 2 * w * z, 1 - 2 * x * x - 2 * z * z, 2 * y * z - 2 * w * x],
+        [2 * x * z - 2 * w * y, 2 * y * z + 2 * w * x, 1 - 2 * x * x - 2 * y * y]
+    ])
+
+
+def read_colmap_model_txt(cameras_path, images_path):
+    """
+    Reads a COLMAP text model (cameras.txt, images.txt).
+
+    Parameters:
+    cameras_path (str): Path to cameras.txt.
+    images_path (str): Path to images.txt.
+
+    Returns:
+    tuple: Intrinsics dict keyed by camera id, and a list of (name, qvec, tvec, camera_id) per image.
+    """
+    intrinsics = {}
+    with open(cameras_path) as f:
+        for line in f:
+            parts = line.strip().split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            camera_id, model = int(parts[0]), parts[1]
+            intrinsics[camera_id] = colmap_intrinsic_matrix(model, [float(p) for p in parts[4:]])
+
+    images = []
+    with open(images_path) as f:
+        lines = [line.strip() for line in f if not line.startswith('#')]
+    for line in lines[::2]:     # every image line is followed by its 2D points line
+        parts = line.split()
+        if not parts:
+            continue
+        qvec = np.array([float(p) for p in parts[1:5]])
+        tvec = np.array([float(p) for p in parts[5:8]])
+        images.append((parts[9], qvec, tvec, int(parts[8])))
+    return intrinsics, images
+
+
+def read_colmap_model_bin(cameras_path, images_path):
+    """
+    Reads a COLMAP binary model (cameras.bin, images.bin).
+
+    Parameters:
+    cameras_path (str): Path to cameras.bin.
+    images_path (str): Path to images.bin.
+
+    Returns:
+    tuple: Intrinsics dict keyed by camera id, and a list of (name, qvec, tvec, camera_id) per image.
+    """
+    import struct
+
+    intrinsics = {}
+    with open(cameras_path, 'rb') as f:
+        num_cameras = struct.unpack('<Q', f.read(8))[0]
+        for _ in range(num_cameras):
+            camera_id, model_id, width, height = struct.unpack('<iiQQ', f.read(24))
+            model, num_params = COLMAP_CAMERA_MODELS[model_id]
+            params = struct.unpack('<' + 'd' * num_params, f.read(8 * num_params))
+            intrinsics[camera_id] = colmap_intrinsic_matrix(model, params)
+
+    images = []
+    with open(images_path, 'rb') as f:
+        num_images = struct.unpack('<Q', f.read(8))[0]
+        for _ in range(num_images):
+            data = struct.unpack('<idddddddi', f.read(64))
+            name = b''
+            char = f.read(1)
+            while char != b'\x00':
+                name += char
+                char = f.read(1)
+            num_points2d = struct.unpack('<Q', f.read(8))[0]
+            f.seek(24 * num_points2d, 1)    # skip (x, y, point3D_id) of every 2D point
+            images.append((name.decode('utf-8'), np.array(data[1:5]), np.array(data[5:8]), data[8]))
+    return intrinsics, images
+
+
+def save_camera_parameters_txt(save_cams_path, rig):
+    """
+    Saves cameras in the MVS .txt layout (cams/00000000_cam.txt).
+
+    Parameters:
+    save_cams_path (str): Output folder.
+    rig (CameraRig): Cameras to save.
+    """
+    for i, (K, E) in enumerate(zip(rig.K, rig.world_to_camera)):
+        filename = f"{save_cams_path}/{i:08d}_cam.txt"
+        with open(filename, 'w') as f:
+            f.write("extrinsic\n")
+            for row in E:
+                f.write(' '.join(map(str, row)) + '\n')
+            f.write("\nintrinsic\n")
+            for row in K:
+                f.write(' '.join(map(str, row)) + '\n')
+
+
 def load_obj(filename):
     """ Load OBJ file into a dictionary containing vertices, optional vertex colors, and faces. """
     vertices = []
@@ -322,4 +567,274 @@ def save_hair2pc(path, vert, color=None):
         else:
             for v in vert:
                 data = 'v %f %f %f\n' % (v[0], v[1], v[2])
-                f.write(data)
\ No newline at end of file
+                f.write(data)
+
+def _parse_obj_vertices(lines, dtype=np.float32):
+    # 'x y z [r g b]' strings (without the leading 'v ') -> vertices (m, 3), colors (m, 3) or None
+    tokens = [line.split() for line in lines]
+    num_cols = {len(t) for t in tokens}
+    if len(num_cols) > 1:
+        # Lines with and without colors in one chunk: parse line by line, colors only if every line has them
+        vertices = np.array([t[:3] for t in tokens], dtype=dtype)
+        colors = np.array([t[3:6] for t in tokens], dtype=dtype) if min(num_cols) >= 6 else None
+        return vertices, colors
+
+    data = np.fromstring(' '.join(lines), dtype=dtype, sep=' ')
+    data = data.reshape(len(lines), -1)
+    colors = data[:, 3:6] if data.shape[1] >= 6 else None
+    return data[:, :3], colors
+
+
+def _parse_obj_faces(lines):
+    # 'i j k ...' strings (without the leading 'f ') -> triangles (m, 3), polygons are fan-triangulated
+    triangles = []
+    for line in lines:
+        face = [int(p.split('/')[0]) - 1 for p in line.split()]
+        for k in range(1, len(face) - 1):
+            triangles.append((face[0], face[k], face[k + 1]))
+    return np.array(triangles, dtype=np.int32).reshape(-1, 3)
+
+
+def iter_obj_vertices(filename, chunk_size=1000000, dtype=np.float32):
+    """
+    Streams the vertices of an OBJ file (e.g. a point cloud saved by save_hair2pc) in chunks.
+
+    Parameters:
+    filename (str): Path to the OBJ file.
+    chunk_size (int): Maximum number of vertices per chunk.
+    dtype (type): Dtype of the parsed vertices and colors.
+
+    Yields:
+    tuple: Vertices (m, 3) and colors (m, 3) or None.
+    """
+    lines = []
+    with open(filename, 'r') as file:
+        for line in file:
+            if line.startswith('v '):
+                lines.append(line[2:])
+                if len(lines) == chunk_size:
+                    yield _parse_obj_vertices(lines, dtype)
+                    lines = []
+    if lines:
+        yield _parse_obj_vertices(lines, dtype)
+
+
+def voxel_downsample(vertices, voxel_size, colors=None):
+    """
+    Keeps one representative vertex per voxel of a regular grid.
+
+    Parameters:
+    vertices (ndarray): Vertices, (n, 3).
+    voxel_size (float): Edge length of the voxel grid.
+    colors (ndarray, optional): Per-vertex colors, (n, 3).
+
+    Returns:
+    tuple: Downsampled vertices and colors (or None).
+    """
+    if len(vertices) == 0:
+        return vertices, colors
+
+    # The grid is absolute (floor(v / voxel_size)), so chunks agree on voxels;
+    # indices are shifted to start at 0 only to pack them into one int64 key, 21 bits per axis
+    voxels = np.floor(vertices / voxel_size).astype(np.int64)
+    voxels -= voxels.min(axis=0)
+    if voxels.max() < (1 << 21):
+        keys = (voxels[:, 0] << 42) | (voxels[:, 1] << 21) | voxels[:, 2]
+        _, idx = np.unique(keys, return_index=True)
+    else:   # extent too large for packed keys
+        _, idx = np.unique(voxels, axis=0, return_index=True)
+    return vertices[idx], (colors[idx] if colors is not None else None)
+
+
+def load_point_cloud(filename, chunk_size=1000000, voxel_size=None, scale=1.0, origin_offset=None):
+    """
+    Loads a vertex-only OBJ point cloud with a streaming chunked reader.
+    Every chunk is brought to the frame of the normalized mesh (v * scale - origin_offset, as
+    normalize_obj does) and, with voxel_size, voxel-downsampled before being kept, so peak memory
+    follows the display budget instead of the file size.
+
+    Parameters:
+    filename (str): Path to the OBJ file.
+    chunk_size (int): Number of vertices parsed at once.
+    voxel_size (float, optional): Voxel size for downsampling, in the scaled units.
+    scale (float): Scale applied to the vertices (e.g. 1000.0 for m -> mm).
+    origin_offset (ndarray, optional): Offset subtracted after scaling, (3,).
+
+    Returns:
+    tuple: Vertices (n, 3) float32 and colors (n, 3) uint8 or None.
+    """
+    origin_offset = np.zeros(3) if origin_offset is None else np.asarray(origin_offset, dtype=np.float64)
+    vertices = []
+    colors = []
+    for v, c in iter_obj_vertices(filename, chunk_size, np.float64):
+        v = (v * scale - origin_offset).astype(np.float32)  # float64 until centered, as in normalize_obj
+        c = c.astype(np.float32) if c is not None else None
+        if voxel_size is not None:
+            v, c = voxel_downsample(v, voxel_size, c)
+        vertices.append(v)
+        if c is not None:
+            colors.append(c)
+
+    has_colors = len(colors) > 0 and len(colors) == len(vertices)
+    vertices = np.concatenate(vertices) if vertices else np.zeros((0, 3), dtype=np.float32)
+    colors = np.concatenate(colors) if has_colors else None
+    if voxel_size is not None:  # Voxels shared by several chunks
+        vertices, colors = voxel_downsample(vertices, voxel_size, colors)
+
+    if colors is not None:
+        if colors.max() <= 1.0:     # save_hair2pc colors may be in [0, 1]
+            colors = colors * 255.0
+        colors = np.clip(colors, 0, 255).astype(np.uint8)
+    return vertices, colors
+
+
+def blend_image(frame, image_path, alpha=0.5):
+    """
+    Blends a rendered frame with the captured image of the same camera.
+
+    Parameters:
+    frame (ndarray): Rendered RGB frame, (h, w, 3) uint8.
+    image_path (str): Path to the captured image (e.g. images/00000000.jpg).
+    alpha (float): Weight of the rendered frame.
+
+    Returns:
+    ndarray: Blended RGB frame with the size of the rendered frame, the rendered frame
+    alone if the image cannot be read.
+    """
+    import cv2 as cv
+
+    image = cv.imread(image_path)
+    if image is None:   # missing or unreadable image, e.g. a camera without a capture
+        print(f"image not found: {image_path}")
+        return frame
+    image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+    image = cv.resize(image, (frame.shape[1], frame.shape[0]), interpolation=cv.INTER_AREA)
+    return cv.addWeighted(np.ascontiguousarray(frame), alpha, image, 1.0 - alpha, 0.0)
+
+
+def normalize_obj(mesh_path, out_prefix, scale=1.0, center=True, chunk_size=1000000):
+    """
+    Scales and centers an OBJ mesh out of core.
+    The OBJ is read once: vertices are scaled and appended to a raw float64 file while the
+    centroid and bounds are accumulated, faces are appended to a raw int32 file. The centroid
+    is then subtracted chunk by chunk through a memory map, and only the centered vertices
+    are stored as float32 (uncentered m -> mm coordinates may be far from the origin).
+
+    Parameters:
+    mesh_path (str): Path to the OBJ file.
+    out_prefix (str): Prefix of the binary outputs (<out_prefix>_vertices.bin, _faces.bin, and _colors.bin for colored meshes).
+    scale (float): Scale applied to the vertices (e.g. 1000.0 for m -> mm).
+    center (bool): Move the centroid to the origin.
+    chunk_size (int): Number of lines parsed at once.
+
+    Returns:
+    dict: Memory-mapped 'vertices' (n, 3), 'faces' (m, 3) and 'colors' (n, 3) or None,
+          'origin_offset' (3,) and 'bounds' (2, 3) after normalization.
+    """
+    vertices_path = out_prefix + '_vertices.bin'
+    vertices_tmp_path = out_prefix + '_vertices_f64.tmp'
+    faces_path = out_prefix + '_faces.bin'
+    colors_path = out_prefix + '_colors.bin'
+
+    total = np.zeros(3)
+    bounds = np.array([np.full(3, np.inf), np.full(3, -np.inf)])
+    num_vertices = num_faces = num_colors = 0
+    c_file = None   # opened on the first colored vertex
+
+    vertices_f64 = None
+    try:
+        with open(mesh_path, 'r') as file, open(vertices_tmp_path, 'wb') as v_file, open(faces_path, 'wb') as f_file:
+            def flush_vertices(lines):
+                nonlocal num_vertices, num_colors, c_file
+                v, c = _parse_obj_vertices(lines, np.float64)
+                v *= scale
+                total[:] += v.sum(axis=0)
+                bounds[0] = np.minimum(bounds[0], v.min(axis=0))
+                bounds[1] = np.maximum(bounds[1], v.max(axis=0))
+                v_file.write(v.tobytes())
+                num_vertices += len(v)
+                if c is not None:
+                    if c_file is None:
+                        c_file = open(colors_path, 'wb')
+                    c_file.write(c.astype(np.float32).tobytes())
+                    num_colors += len(c)
+
+            def flush_faces(lines):
+                nonlocal num_faces
+                f = _parse_obj_faces(lines)
+                f_file.write(f.tobytes())
+                num_faces += len(f)
+
+            v_lines = []
+            f_lines = []
+            for line in file:
+                if line.startswith('v '):
+                    v_lines.append(line[2:])
+                    if len(v_lines) == chunk_size:
+                        flush_vertices(v_lines)
+                        v_lines = []
+                elif line.startswith('f '):
+                    f_lines.append(line[2:])
+                    if len(f_lines) == chunk_size:
+                        flush_faces(f_lines)
+                        f_lines = []
+            if v_lines:
+                flush_vertices(v_lines)
+            if f_lines:
+                flush_faces(f_lines)
+        if c_file is not None:
+            c_file.close()
+        elif os.path.exists(colors_path):   # stale colors of a previous run
+            os.remove(colors_path)
+
+        origin_offset = total / max(num_vertices, 1) if center else np.zeros(3)
+        with open(vertices_path, 'wb') as v_file:
+            if num_vertices:
+                vertices_f64 = np.memmap(vertices_tmp_path, dtype=np.float64, mode='r', shape=(num_vertices, 3))
+                for start in range(0, num_vertices, chunk_size):
+                    v_file.write((vertices_f64[start:start + chunk_size] - origin_offset).astype(np.float32).tobytes())
+                vertices_f64 = None     # close the memory map before the temporary file is removed
+    except BaseException:
+        # Do not leave partial outputs that look like a complete normalization
+        vertices_f64 = None
+        if c_file is not None:
+            c_file.close()
+        for path in (vertices_path, faces_path, colors_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        if os.path.exists(vertices_tmp_path):
+            os.remove(vertices_tmp_path)
+
+    vertices = np.memmap(vertices_path, dtype=np.float32, mode='r', shape=(num_vertices, 3)) \
+        if num_vertices else np.zeros((0, 3), dtype=np.float32)
+
+    faces = np.memmap(faces_path, dtype=np.int32, mode='r', shape=(num_faces, 3)) \
+        if num_faces else np.zeros((0, 3), dtype=np.int32)
+    colors = np.memmap(colors_path, dtype=np.float32, mode='r', shape=(num_colors, 3)) \
+        if num_colors and num_colors == num_vertices else None
+
+    return {
+        'vertices': vertices,
+        'faces': faces,
+        'colors': colors,
+        'origin_offset': origin_offset,
+        'bounds': bounds - origin_offset
+    }
+
+
+def save_obj_chunked(filename, vertices, faces, colors=None, chunk_size=1000000):
+    """ Save vertices, optional vertex colors, and faces to an OBJ file, chunk by chunk (memory-mapped inputs). """
+    with open(filename, 'w') as file:
+        has_colors = colors is not None and len(colors) == len(vertices)
+        for start in range(0, len(vertices), chunk_size):
+            v = vertices[start:start + chunk_size]
+            if has_colors:
+                np.savetxt(file, np.hstack([v, colors[start:start + chunk_size]]), fmt='v %.6f %.6f %.6f %.6f %.6f %.6f')
+            else:
+                np.savetxt(file, v, fmt='v %.6f %.6f %.6f')
+
+        for start in range(0, len(faces), chunk_size):
+            # OBJ format uses 1-based indexing for faces
+            np.savetxt(file, faces[start:start + chunk_size] + 1, fmt='f %d %d %d')
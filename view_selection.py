@@ -0,0 +1,180 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+
+def compute_visibility(rig, points, image_size, cell_size=8, depth_tol=0.01, chunk_size=64):
+    """
+    Computes which points each camera sees, batched over cameras.
+    A point is visible if it projects inside the image in front of the camera and is not
+    behind the nearest point of its cell in a coarse z-buffer (cell_size pixels).
+
+    Parameters:
+    rig (CameraRig): Cameras.
+    points (ndarray): Mesh points in the camera world frame, (m, 3).
+    image_size (tuple): Image width and height.
+    cell_size (int): Z-buffer cell size in pixels.
+    depth_tol (float): Relative depth tolerance of the z-buffer test.
+    chunk_size (int): Number of cameras projected at once.
+
+    Returns:
+    ndarray: Visibility, (n, m) bool.
+    """
+    w, h = image_size
+    cells_x, cells_y = w // cell_size + 1, h // cell_size + 1
+    num_cells = cells_x * cells_y
+    visibility = np.zeros((len(rig), len(points)), dtype=bool)
+
+    for start in range(0, len(rig), chunk_size):
+        P = rig.projections[start:start + chunk_size]
+        proj = np.einsum('nij,mj->nmi', P[:, :, :3], points) + P[:, None, :, 3]    # (c, m, 3)
+        z = proj[..., 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = proj[..., 0] / z
+            v = proj[..., 1] / z
+        inside = (z > 0) & (u >= 0) & (u < w) & (v >= 0) & (v < h)
+
+        # Coarse z-buffer of all cameras of the chunk at once, cells offset by camera
+        cam_idx, point_idx = np.nonzero(inside)
+        cells = cam_idx * num_cells + (v[cam_idx, point_idx] // cell_size).astype(np.int64) * cells_x \
+            + (u[cam_idx, point_idx] // cell_size).astype(np.int64)
+        depth = z[cam_idx, point_idx]
+        zbuffer = np.full(len(P) * num_cells, np.inf)
+        np.minimum.at(zbuffer, cells, depth)
+
+        front = depth <= zbuffer[cells] * (1.0 + depth_tol)
+        visibility[start + cam_idx[front], point_idx[front]] = True
+    return visibility
+
+
+def score_views(centers_ref, visibility_ref, centers, visibility, points, theta0=5.0, sigma1=1.0, sigma2=10.0, chunk_size=64):
+    """
+    Scores reference cameras against cameras from their shared visible points (MVSNet view selection).
+    Every shared point adds exp(-(theta - theta0)^2 / (2 sigma^2)), theta being the triangulation
+    angle in degrees, sigma1 below theta0 and sigma2 above.
+
+    Parameters:
+    centers_ref (ndarray): Reference camera centers, (r, 3).
+    visibility_ref (ndarray): Reference camera visibility, (r, m) bool.
+    centers (ndarray): Camera centers, (n, 3).
+    visibility (ndarray): Camera visibility, (n, m) bool.
+    points (ndarray): Points, (m, 3).
+    chunk_size (int): Number of cameras scored at once.
+
+    Returns:
+    ndarray: Scores, (r, n).
+    """
+    scores = np.zeros((len(centers_ref), len(centers)))
+    for a, (center_ref, vis_ref) in enumerate(zip(centers_ref, visibility_ref)):
+        idx = np.flatnonzero(vis_ref)
+        if len(idx) == 0:
+            continue
+        p = points[idx]
+        rays_ref = center_ref - p
+        rays_ref /= np.linalg.norm(rays_ref, axis=1, keepdims=True)
+
+        for start in range(0, len(centers), chunk_size):
+            rays = centers[start:start + chunk_size, None, :] - p[None]     # (c, k, 3)
+            rays /= np.linalg.norm(rays, axis=2, keepdims=True)
+            cos = np.einsum('ckj,kj->ck', rays, rays_ref)
+            theta = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+            sigma = np.where(theta <= theta0, sigma1, sigma2)
+            weight = np.exp(-(theta - theta0) ** 2 / (2 * sigma ** 2))
+            scores[a, start:start + chunk_size] = (weight * visibility[start:start + chunk_size, idx]).sum(axis=1)
+    return scores
+
+
+# Process pool workers get the shared arrays once, through the initializer
+_worker_data = {}
+
+
+def _init_worker(centers, visibility, points, params):
+    _worker_data.update(centers=centers, visibility=visibility, points=points, params=params)
+
+
+def _score_rows(rows):
+    d = _worker_data
+    return score_views(d['centers'][rows], d['visibility'][rows], d['centers'], d['visibility'], d['points'], **d['params'])
+
+
+class ViewSelector:
+    def __init__(self, points, image_size, theta0=5.0, sigma1=1.0, sigma2=10.0, min_baseline=0.0,
+                 cell_size=8, chunk_size=64, num_workers=0):
+        """
+        Incremental pairwise view scores for MVS source view selection.
+        Adding cameras only scores the new cameras against all cameras, the matrix is symmetric.
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.image_size = image_size
+        self.params = {'theta0': theta0, 'sigma1': sigma1, 'sigma2': sigma2, 'chunk_size': chunk_size}
+        self.min_baseline = min_baseline
+        self.cell_size = cell_size
+        self.chunk_size = chunk_size
+        self.num_workers = num_workers
+
+        self.centers = np.zeros((0, 3))
+        self.visibility = np.zeros((0, len(self.points)), dtype=bool)
+        self.scores = np.zeros((0, 0))
+
+    def add_cameras(self, rig):
+        num_old = len(self.centers)
+        visibility_new = compute_visibility(rig, self.points, self.image_size, self.cell_size, chunk_size=self.chunk_size)
+        self.centers = np.concatenate([self.centers, rig.centers.astype(np.float64)])
+        self.visibility = np.concatenate([self.visibility, visibility_new])
+
+        rows = np.arange(num_old, len(self.centers))
+        scores_new = self.score_rows(rows)      # (new, all)
+        scores_new[np.arange(len(rows)), rows] = 0.0    # no self pairs
+        if self.min_baseline > 0:
+            baseline = np.linalg.norm(self.centers[rows, None, :] - self.centers[None], axis=2)
+            scores_new[baseline < self.min_baseline] = 0.0
+
+        scores = np.zeros((len(self.centers), len(self.centers)))
+        scores[:num_old, :num_old] = self.scores
+        scores[num_old:] = scores_new
+        scores[:, num_old:] = scores_new.T
+        self.scores = scores
+
+    def score_rows(self, rows):
+        if self.num_workers <= 1 or len(rows) <= self.chunk_size:
+            return score_views(self.centers[rows], self.visibility[rows], self.centers, self.visibility, self.points, **self.params)
+
+        chunks = [rows[start:start + self.chunk_size] for start in range(0, len(rows), self.chunk_size)]
+        with ProcessPoolExecutor(self.num_workers, initializer=_init_worker,
+                                 initargs=(self.centers, self.visibility, self.points, self.params)) as pool:
+            return np.concatenate(list(pool.map(_score_rows, chunks)))
+
+    def pairs(self, num_src=10):
+        """Best source views of every reference camera, [(ref, [(src, score), ...]), ...]."""
+        order = np.argsort(-self.scores, axis=1, kind='stable')[:, :num_src]
+        pairs = []
+        for ref, srcs in enumerate(order):
+            pairs.append((ref, [(src, self.scores[ref, src]) for src in srcs if self.scores[ref, src] > 0]))
+        return pairs
+
+    def save_pair_txt(self, pair_path, num_src=10):
+        # MVSNet pair.txt: number of views, then per view its id and "count src score src score ..."
+        with open(pair_path, 'w') as f:
+            f.write(f'{len(self.scores)}\n')
+            for ref, srcs in self.pairs(num_src):
+                f.write(f'{ref}\n')
+                f.write(f'{len(srcs)} ' + ' '.join(f'{src} {score:.6f}' for src, score in srcs) + '\n')
+
+
+if __name__ == "__main__":
+    # Example usage, MVS .txt cameras and the mesh in the same (mm) frame
+    from glob import glob
+    from recon_camera import CameraReconstructor
+    from utils import normalize_obj
+
+    image_size = (1984,1984)
+    calib_path = sorted(glob(os.path.abspath("./data/example_mvs_txt/cams/*.txt")))
+    mesh_path = os.path.abspath('./data/example_mvs_txt/filtered_mesh_9.obj')
+
+    mesh = normalize_obj(mesh_path, os.path.splitext(mesh_path)[0], scale=1.0, center=False)
+    points = mesh['vertices'][::max(len(mesh['vertices']) // 100000, 1)]   # subsample to ~100k points
+    rig = CameraReconstructor(calib_path, np.array([0.0, 0.0, 0.0]), image_size).camera_params
+
+    selector = ViewSelector(points, image_size, num_workers=os.cpu_count())
+    selector.add_cameras(rig)
+    selector.save_pair_txt(os.path.join(os.path.dirname(calib_path[0]), '..', 'pair.txt'))